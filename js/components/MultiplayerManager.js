@@ -1,6 +1,20 @@
 import * as THREE from 'three';
 import Boat from './Boat.js';
 
+// Decimal places kept when sending positions (centimeters) and angles
+const POSITION_DECIMALS = 2;
+const ANGLE_DECIMALS = 3;
+
+/**
+ * Round a number to a fixed number of decimals so it serializes compactly
+ * @param {number} value - The value to round
+ * @param {number} decimals - Number of decimal places to keep
+ */
+function roundTo(value, decimals) {
+    const factor = 10 ** decimals;
+    return Math.round(value * factor) / factor;
+}
+
 /**
  * Manages multiplayer functionality for the sailing game
  */
@@ -19,9 +33,15 @@ class MultiplayerManager {
         // WebSocket connection
         this.socket = null;
         
+        // Decoder for binary (UTF-8 JSON) frames sent by the server
+        this.textDecoder = new TextDecoder();
+        
         // Remote boats (other players)
         this.remoteBoats = {};
         
+        // ID the server assigned to this client (sent in the welcome message)
+        this.clientId = null;
+        
         // Connection status
         this.connected = false;
         
@@ -42,6 +62,9 @@ class MultiplayerManager {
         
         this.socket = new WebSocket(serverUrl);
         
+        // The server sends JSON as binary frames; receive them as ArrayBuffers
+        this.socket.binaryType = 'arraybuffer';
+        
         // Set up event handlers
         this.socket.onopen = this.handleOpen.bind(this);
         this.socket.onclose = this.handleClose.bind(this);
@@ -92,29 +115,45 @@ class MultiplayerManager {
      */
     handleMessage(event) {
         try {
-            const message = JSON.parse(event.data);
-            
-            switch(message.type) {
-                case 'initial_boats':
-                    this.handleInitialBoats(message.boats);
-                    break;
-                
-                case 'boat_update':
-                    this.handleBoatUpdate(message.client_id, message.boat_data);
-                    break;
-                
-                case 'boat_disconnected':
-                    this.handleBoatDisconnected(message.client_id);
-                    break;
-                
-                default:
-                    console.warn('Unknown message type:', message.type);
-            }
+            const text = typeof event.data === 'string'
+                ? event.data
+                : this.textDecoder.decode(event.data);
+            this.dispatchMessage(JSON.parse(text));
         } catch (error) {
             console.error('Error processing message:', error);
         }
     }
     
+    /**
+     * Dispatch a single decoded server message
+     */
+    dispatchMessage(message) {
+        switch(message.type) {
+            case 'welcome':
+                this.clientId = String(message.client_id);
+                break;
+            
+            case 'initial_boats':
+                this.handleInitialBoats(message.boats);
+                break;
+            
+            case 'boat_update':
+                this.handleBoatUpdate(message.client_id, message.boat_data);
+                break;
+            
+            case 'boats_batch':
+                this.handleBoatsBatch(message.boats);
+                break;
+            
+            case 'boat_disconnected':
+                this.handleBoatDisconnected(message.client_id);
+                break;
+            
+            default:
+                console.warn('Unknown message type:', message.type);
+        }
+    }
+    
     /**
      * Handle initial list of boats already connected
      */
@@ -140,6 +179,17 @@ class MultiplayerManager {
         }
     }
     
+    /**
+     * Handle updates for several remote boats sent in a single message
+     */
+    handleBoatsBatch(boats) {
+        for (const [clientId, boatData] of Object.entries(boats)) {
+            // Batches are sent to everyone, so they include our own boat
+            if (clientId === this.clientId) continue;
+            this.handleBoatUpdate(clientId, boatData);
+        }
+    }
+    
     /**
      * Handle a boat disconnection
      */
@@ -254,20 +304,20 @@ class MultiplayerManager {
         const sailAngle = this.playerBoat.getSailAngle();
         const heelAngle = this.playerBoat.getHeelAngle(); // Get the heel angle
         
-        // Create the boat data to send
+        // Create the boat data to send, rounded so the server relays fewer bytes
         const boatData = {
             position: {
-                x: position.x,
-                y: position.y,
-                z: position.z
+                x: roundTo(position.x, POSITION_DECIMALS),
+                y: roundTo(position.y, POSITION_DECIMALS),
+                z: roundTo(position.z, POSITION_DECIMALS)
             },
             rotation: {
-                x: rotation.x,
-                y: rotation.y,
-                z: rotation.z
+                x: roundTo(rotation.x, ANGLE_DECIMALS),
+                y: roundTo(rotation.y, ANGLE_DECIMALS),
+                z: roundTo(rotation.z, ANGLE_DECIMALS)
             },
-            sailAngle: sailAngle,
-            heelAngle: heelAngle, // Include heel angle in updates
+            sailAngle: roundTo(sailAngle, ANGLE_DECIMALS),
+            heelAngle: roundTo(heelAngle, ANGLE_DECIMALS), // Include heel angle in updates
             flag: this.flagCode // Include flag information in regular updates
         };
         
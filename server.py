@@ -1,33 +1,79 @@
 import asyncio
-import json
+import dataclasses
 import logging
+import msgspec
+import numpy as np
+import orjson
 import websockets
 import os
 import math
 import time
-import uuid
-import statistics
 import datetime
+import itertools
 import random
 import argparse  # Added for command-line arguments
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     format="%(asctime)s %(message)s",
     level=logging.INFO,
 )
+logger = logging.getLogger(__name__)
 
 # Parse command-line arguments
 parser = argparse.ArgumentParser(description='Sailing game WebSocket server')
 parser.add_argument('-r', '--record', action='store_true', help='Enable recording of player movements')
 args = parser.parse_args()
 
-# Store connected clients and their boat data
+# Store connected clients (Client objects) by client ID
 connected_clients = {}
 
+# Source of client IDs; small sequential ints are never reused, unlike id(websocket)
+client_id_counter = itertools.count(1)
+
+# (client_id, websocket, uses_msgpack) of every connected client, kept
+# contiguous for fast broadcast iteration, and each client's position in that list
+client_sockets = []
+client_socket_index = {}
+
+# Latest boat data of each client that has sent a boat update
+boats_with_data = {}
+
+# Loop time at which each currently stalled client started missing broadcasts
+stalled_clients = {}
+
+# Pending close tasks of slow clients; asyncio only keeps weak references
+closing_tasks = set()
+
+# Latest boat data of clients whose updates haven't been relayed yet; the
+# next world tick relays them
+pending_boat_updates = {}
+
 # Store AI boat data
 ai_boats = {}
 
+# Source of AI boat IDs, which only need to be unique within this process
+ai_boat_id_counter = itertools.count(1)
+
+# Boat data of each AI boat, refreshed whenever AI boats are added or removed
+ai_boats_data = {}
+
+# Structure-of-arrays state for linear AI boats, one row per boat in "ids" order
+linear_boats = {
+    "ids": [],
+    "position": np.zeros((0, 2)),  # x, z
+    "velocity": np.zeros((0, 2)),  # x, z in units per second
+    "speed": np.zeros(0),
+    "distance": np.zeros(0),
+    "max_distance": np.zeros(0),
+    "start_position": np.zeros((0, 2)),  # x, z
+}
+
 # Track player positions for dynamic AI boat placement
 player_positions = []
 
@@ -40,6 +86,85 @@ RECORDINGS_DIR = "recordings"
 # Pirate flag identifier
 PIRATE_FLAG = "pirate"
 
+# Hull colors recorded pirates are randomly painted with
+PIRATE_COLORS = ("#8B4513", "#006400", "#2F4F4F", "#800000", "#191970")
+
+# Seconds between world ticks, each of which moves the AI boats and relays
+# pending player boat updates in a single broadcast
+WORLD_TICK_INTERVAL = 0.05
+
+# AI boats are only rebroadcast once they have moved this far (x + z
+# distance), or when this many seconds have passed since they were last sent
+AI_BOAT_MIN_MOVE = 0.1
+AI_BOAT_KEEPALIVE = 1.0
+
+# Messages clients can send, tagged by their "type" field. Boat data is
+# typed so values that can't be relayed (such as integers too large to
+# encode again) are rejected when the message is decoded.
+class Vector3(msgspec.Struct):
+    x: float
+    y: float
+    z: float
+
+class BoatData(msgspec.Struct, omit_defaults=True):
+    position: Vector3
+    rotation: Vector3
+    sailAngle: float | None = None
+    heelAngle: float | None = None
+    flag: str | None = None
+
+class BoatUpdateMessage(msgspec.Struct, tag="boat_update", tag_field="type"):
+    boat_data: BoatData
+
+class FlagUpdateMessage(msgspec.Struct, tag="flag_update", tag_field="type"):
+    flag_code: str = ""
+
+# Parse and validate client messages in a single pass, for each wire format
+json_message_decoder = msgspec.json.Decoder(BoatUpdateMessage | FlagUpdateMessage)
+msgpack_message_decoder = msgspec.msgpack.Decoder(BoatUpdateMessage | FlagUpdateMessage)
+
+@dataclasses.dataclass(slots=True)
+class Client:
+    """State kept for each connected client."""
+    websocket: object
+    msgpack: bool  # Whether the client negotiated the MessagePack wire format
+    boat_data: dict | None = None
+    flag: str | None = None
+    recording: list | None = None  # Movements recorded when recording is enabled
+    recording_start_time: float | None = None
+
+# WebSocket subprotocol a client requests to exchange MessagePack instead of JSON
+MSGPACK_SUBPROTOCOL = "msgpack"
+msgpack_encoder = msgspec.msgpack.Encoder()
+
+# Keepalive ping settings (seconds); dead or stalled connections are closed
+# once a ping goes unanswered
+PING_INTERVAL = 10
+PING_TIMEOUT = 10
+
+# Bytes that may pile up in a connection's write buffer before droppable
+# broadcasts skip it, dropping stale updates for slow clients instead of
+# buffering them
+WRITE_LIMIT = 2 ** 16
+
+# Seconds a client may stay over WRITE_LIMIT before it is disconnected
+SLOW_CLIENT_TIMEOUT = 5
+
+# Maximum number of incoming messages buffered per connection
+MAX_QUEUE = 32
+
+# Fixed interpolation speed of recorded boats (units per second)
+RECORDED_BOAT_SPEED = 5
+
+# Longest time step applied to AI boats in one update, so a stalled event
+# loop doesn't make them jump across the map
+MAX_AI_TIMESTEP = 0.5
+
+# Decimal places kept in broadcast positions (centimeters) and angles, the
+# same precision the browser client sends
+POSITION_DECIMALS = 2
+ANGLE_DECIMALS = 3
+
 # Round-robin index for cycling through recordings
 current_recording_index = 0
 
@@ -54,78 +179,90 @@ record_sessions = args.record
 
 # Log recording mode status
 if record_sessions:
-    logging.info("Recording mode ENABLED - Player movements will be recorded")
+    logger.info("Recording mode ENABLED - Player movements will be recorded")
 else:
-    logging.info("Recording mode DISABLED - Will use existing recordings for bots")
+    logger.info("Recording mode DISABLED - Will use existing recordings for bots")
 
 async def register(websocket):
     """Register a new client connection."""
-    client_id = id(websocket)
-    connected_clients[client_id] = {
-        "websocket": websocket,
-        "boat_data": None,
-        "flag": None,  # Initialize flag as None
-        "recording": [] if record_sessions else None,  # Initialize recording array if enabled
-        "recording_start_time": time.time() if record_sessions else None  # Record start time
-    }
-    logging.info(f"Client {client_id} connected. Total clients: {len(connected_clients)}")
-    
-    # Send initial list of other boats to the new client
-    other_boats = {}
-    for cid, data in connected_clients.items():
-        if cid != client_id and data["boat_data"]:
-            boat_data = data["boat_data"].copy()
-            # Add flag information if available
-            if data["flag"]:
-                boat_data["flag"] = data["flag"]
-            other_boats[cid] = boat_data
-    
-    # Add AI boats to the initial boats list
-    for ai_id, ai_data in ai_boats.items():
-        other_boats[ai_id] = ai_data["boat_data"]
+    client_id = next(client_id_counter)
+    websocket.client_id = client_id
+    uses_msgpack = websocket.subprotocol == MSGPACK_SUBPROTOCOL
+    connected_clients[client_id] = Client(
+        websocket,
+        uses_msgpack,
+        recording=[] if record_sessions else None,  # Initialize recording array if enabled
+        recording_start_time=time.monotonic() if record_sessions else None  # Record start time
+    )
+    client_socket_index[client_id] = len(client_sockets)
+    client_sockets.append((client_id, websocket, uses_msgpack))
+    logger.info("Client %s connected. Total clients: %s", client_id, len(connected_clients))
+    
+    # Tell the client its ID so it can skip its own boat in batched updates
+    await websocket.send(serialize_message({
+        "type": "welcome",
+        "client_id": client_id
+    }, uses_msgpack))
+    
+    # Send initial list of other boats (players and AI) to the new client
+    other_boats = {**boats_with_data, **ai_boats_data}
     
     if other_boats:
-        initial_message = json.dumps({
+        initial_message = serialize_message({
             "type": "initial_boats",
             "boats": other_boats
-        })
+        }, uses_msgpack)
         await websocket.send(initial_message)
 
 async def unregister(websocket):
     """Unregister a client connection."""
-    client_id = id(websocket)
+    client_id = websocket.client_id
     if client_id in connected_clients:
-        # Save recording if we have sufficient movement data
-        if record_sessions and connected_clients[client_id]["recording"]:
-            recording = connected_clients[client_id]["recording"]
-            
-            # Only save if we have enough data points to be useful (at least 30 movements)
-            if len(recording) > 30:
-                save_recording(client_id, recording)
-            else:
-                logging.info(f"Not saving recording for client {client_id} - insufficient data points ({len(recording)})")
+        client = connected_clients.pop(client_id)
         
         # Log player's last position
-        if connected_clients[client_id]["boat_data"]:
-            pos = connected_clients[client_id]["boat_data"]["position"]
-            logging.info(f"Client {client_id} disconnected. Last position: x={pos['x']}, y={pos['y']}. Remaining clients: {len(connected_clients)-1}")
+        if client.boat_data:
+            pos = client.boat_data["position"]
+            logger.info("Client %s disconnected. Last position: x=%s, y=%s. Remaining clients: %s", client_id, pos['x'], pos['y'], len(connected_clients))
         else:
-            logging.info(f"Client {client_id} disconnected. No position data. Remaining clients: {len(connected_clients)-1}")
+            logger.info("Client %s disconnected. No position data. Remaining clients: %s", client_id, len(connected_clients))
             
-        del connected_clients[client_id]
+        boats_with_data.pop(client_id, None)
+        stalled_clients.pop(client_id, None)
+        # Don't relay an update that would recreate the boat after it's gone
+        pending_boat_updates.pop(client_id, None)
         
-        # Update player positions list
-        update_player_position_list()
+        # Remove from the broadcast list by moving the last entry into its slot
+        index = client_socket_index.pop(client_id)
+        last = client_sockets.pop()
+        if index < len(client_sockets):
+            client_sockets[index] = last
+            client_socket_index[last[0]] = index
         
         # Notify other clients that this boat is gone
-        disconnection_message = json.dumps({
+        disconnection_message = {
             "type": "boat_disconnected",
             "client_id": client_id
-        })
+        }
         
-        await broadcast_to_others(disconnection_message, client_id)
+        broadcast_to_others(disconnection_message, client_id)
+        
+        # Save recording if we have sufficient movement data, once the client
+        # is fully removed so nothing else waits on the file write
+        recording = client.recording
+        if record_sessions and recording:
+            # Only save if we have enough data points to be useful (at least 30 movements)
+            if len(recording) > 30:
+                await save_recording(client_id, recording)
+            else:
+                logger.info("Not saving recording for client %s - insufficient data points (%s)", client_id, len(recording))
+
+def write_recording_file(filename, recording_data):
+    """Write recording data to a JSON file (blocking, run in a worker thread)."""
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(recording_data, option=orjson.OPT_INDENT_2))
 
-def save_recording(client_id, recording):
+async def save_recording(client_id, recording):
     """Save a player's movement recording to a JSON file."""
     try:
         # Create a unique filename with timestamp
@@ -139,18 +276,17 @@ def save_recording(client_id, recording):
             "movements": recording
         }
         
-        # Save to file
-        with open(filename, 'w') as f:
-            json.dump(recording_data, f, indent=2)
+        # Save to file without blocking the event loop
+        await asyncio.to_thread(write_recording_file, filename, recording_data)
         
-        logging.info(f"Saved recording with {len(recording)} movements to {filename}")
+        logger.info("Saved recording with %s movements to %s", len(recording), filename)
         
         # Add to available recordings for bots to use
         global recorded_paths
         recorded_paths.append(recording_data)
         
     except Exception as e:
-        logging.error(f"Error saving recording: {e}")
+        logger.error("Error saving recording: %s", e)
 
 def load_recordings():
     """Load all available recordings from the recordings directory."""
@@ -161,78 +297,116 @@ def load_recordings():
         
         # Check if directory exists
         if not os.path.exists(RECORDINGS_DIR):
-            logging.info(f"Recordings directory does not exist. No recordings loaded.")
+            logger.info("Recordings directory does not exist. No recordings loaded.")
             return
         
         # List all JSON files in the recordings directory
-        files = [f for f in os.listdir(RECORDINGS_DIR) if f.endswith('.json')]
+        with os.scandir(RECORDINGS_DIR) as entries:
+            files = [entry for entry in entries if entry.name.endswith('.json') and entry.is_file()]
         
         if not files:
-            logging.info("No recording files found.")
+            logger.info("No recording files found.")
             return
         
-        # Load each file
+        # Load each file, keeping only the movements that bots replay
         for file in files:
             try:
-                with open(os.path.join(RECORDINGS_DIR, file), 'r') as f:
-                    recording_data = json.load(f)
-                    recorded_paths.append(recording_data)
-                    logging.info(f"Loaded recording {file} with {len(recording_data['movements'])} movements")
+                with open(file.path, 'rb') as f:
+                    movements = orjson.loads(f.read())["movements"]
+                recorded_paths.append({"movements": movements})
+                logger.info("Loaded recording %s with %s movements", file.name, len(movements))
             except Exception as e:
-                logging.error(f"Error loading recording {file}: {e}")
+                logger.error("Error loading recording %s: %s", file.name, e)
         
-        logging.info(f"Loaded {len(recorded_paths)} recordings for bot replays")
+        logger.info("Loaded %s recordings for bot replays", len(recorded_paths))
     except Exception as e:
-        logging.error(f"Error loading recordings: {e}")
+        logger.error("Error loading recordings: %s", e)
 
 def update_player_position_list(log_positions=False):
     """Update the list of player positions for AI boat placement."""
     global player_positions
     player_positions = []
     
-    for client_id, client_data in connected_clients.items():
-        if client_data["boat_data"] and "position" in client_data["boat_data"]:
-            player_positions.append(client_data["boat_data"]["position"])
+    for client in connected_clients.values():
+        if client.boat_data and "position" in client.boat_data:
+            player_positions.append(client.boat_data["position"])
             
     # Log the current player positions (only if requested to avoid log spam)
     if log_positions and player_positions:
         positions_str = ", ".join([f"({p['x']}, {p['y']})" for p in player_positions])
-        logging.info(f"Current player positions: {positions_str}")
+        logger.info("Current player positions: %s", positions_str)
     elif log_positions:
-        logging.info("No player positions available")
+        logger.info("No player positions available")
 
 def get_player_center_area():
     """Calculate the center area where players are located."""
+    # Player positions are not tracked per message, so refresh them on demand
+    update_player_position_list()
+    
     if not player_positions:
         # Default coordinates if no players
         return {"x": 60, "y": 0}  # Set default to expected player area
     
-    # Calculate average position
-    avg_x = statistics.mean([p["x"] for p in player_positions])
-    avg_y = statistics.mean([p["y"] for p in player_positions])
+    # Calculate average position in a single pass
+    sum_x = sum_y = 0.0
+    for p in player_positions:
+        sum_x += p["x"]
+        sum_y += p["y"]
+    count = len(player_positions)
     
-    return {"x": avg_x, "y": avg_y}
+    return {"x": sum_x / count, "y": sum_y / count}
 
-async def broadcast_to_all(message):
-    """Broadcast message to all clients."""
-    tasks = []
-    for client_id, client_data in connected_clients.items():
-        websocket = client_data["websocket"]
-        tasks.append(asyncio.create_task(websocket.send(message)))
-    
-    if tasks:
-        await asyncio.gather(*tasks)
+def serialize_message(message, use_msgpack):
+    """Serialize a message in the wire format a client negotiated."""
+    if use_msgpack:
+        return msgpack_encoder.encode(message)
+    # Player boats are keyed by integer client IDs, which orjson only
+    # serializes when OPT_NON_STR_KEYS is set
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS)
 
-async def broadcast_to_others(message, sender_id):
-    """Broadcast message to all clients except the sender."""
-    tasks = []
-    for client_id, client_data in connected_clients.items():
+def broadcast_to_all(message, droppable=False):
+    """Broadcast a message to all clients."""
+    broadcast_to_others(message, None, droppable)
+
+def broadcast_to_others(message, sender_id, droppable=False):
+    """Broadcast a message to all clients except the sender."""
+    json_sockets = []
+    msgpack_sockets = []
+    for client_id, websocket, uses_msgpack in client_sockets:
         if client_id != sender_id:
-            websocket = client_data["websocket"]
-            tasks.append(asyncio.create_task(websocket.send(message)))
+            # Droppable messages are superseded by the next tick, so they skip
+            # backed-up clients; one-shot messages are always written
+            if droppable:
+                if websocket.transport.get_write_buffer_size() > WRITE_LIMIT:
+                    handle_stalled_client(client_id, websocket)
+                    continue
+                if stalled_clients:
+                    stalled_clients.pop(client_id, None)
+            if uses_msgpack:
+                msgpack_sockets.append(websocket)
+            else:
+                json_sockets.append(websocket)
     
-    if tasks:
-        await asyncio.gather(*tasks)
+    if json_sockets:
+        websockets.broadcast(json_sockets, serialize_message(message, False))
+    if msgpack_sockets:
+        websockets.broadcast(msgpack_sockets, serialize_message(message, True))
+
+def handle_stalled_client(client_id, websocket):
+    """Track a stalled client and disconnect it after SLOW_CLIENT_TIMEOUT seconds."""
+    now = asyncio.get_running_loop().time()
+    stalled_since = stalled_clients.setdefault(client_id, now)
+    
+    if now - stalled_since > SLOW_CLIENT_TIMEOUT and websocket.open:
+        logger.info("Client %s is too slow to keep up, disconnecting", client_id)
+        task = asyncio.create_task(websocket.close(1008, "client too slow"))
+        closing_tasks.add(task)
+        task.add_done_callback(closing_tasks.discard)
+
+def refresh_ai_boats_data():
+    """Rebuild the cached boat data of AI boats after boats are added or removed."""
+    global ai_boats_data
+    ai_boats_data = {ai_id: ai_data["boat_data"] for ai_id, ai_data in ai_boats.items()}
 
 def create_ai_boats():
     """Create initial AI-controlled boats."""
@@ -245,15 +419,15 @@ def create_ai_boats():
         for i in range(min(2, len(recorded_paths))):
             create_recorded_boat(recorded_paths[i])
         
-        logging.info(f"Created initial AI boats using recorded paths")
+        logger.info("Created initial AI boats using recorded paths")
     else:
         # If no recordings available, log a message but don't create default boats
-        logging.info("No recorded paths available for AI boats. Run with -r flag to create recordings.")
+        logger.info("No recorded paths available for AI boats. Run with -r flag to create recordings.")
 
 def create_new_boat(direction):
     """Create a new AI boat with the specified direction."""
     center = {"x": 60, "y": 0}  # Middle of the observed player path
-    boat_id = f"pirate_{uuid.uuid4()}"
+    boat_id = f"pirate_{next(ai_boat_id_counter)}"
     
     # In Three.js, rotation.y of 0 points along negative Z axis
     movement_angle = direction["angle"]
@@ -270,42 +444,76 @@ def create_new_boat(direction):
             "sailAngle": 0,
             "flag": PIRATE_FLAG  # Add pirate flag to AI boats
         },
-        "direction": {
-            "x": math.sin(movement_angle),  # x component of direction
-            "z": -math.cos(movement_angle)  # z component of direction (negative z is forward in Three.js)
-        },
-        "speed": direction["speed"],
-        "start_position": {"x": center["x"], "z": center["y"]},
-        "distance": 0,
-        "max_distance": 600,  # Increased distance before resetting (hundreds of units away)
         "created_at": time.time(),  # Add creation timestamp to track boat age
         "type": "linear",  # Mark this as a linear path boat
+        "last_sent": None,  # Position and time this boat was last broadcast
     }
+    refresh_ai_boats_data()
+    
+    # Add the boat's movement state as a new row of the linear boat arrays
+    state = linear_boats
+    state["ids"].append(boat_id)
+    state["position"] = np.vstack([state["position"], [center["x"], center["y"]]])
+    # Direction and speed never change, so store them premultiplied
+    state["velocity"] = np.vstack([
+        state["velocity"],
+        # Negative z is forward in Three.js
+        [math.sin(movement_angle) * direction["speed"], -math.cos(movement_angle) * direction["speed"]]
+    ])
+    state["speed"] = np.append(state["speed"], direction["speed"])
+    state["distance"] = np.append(state["distance"], 0)
+    # Increased distance before resetting (hundreds of units away)
+    state["max_distance"] = np.append(state["max_distance"], 600)
+    state["start_position"] = np.vstack([state["start_position"], [center["x"], center["y"]]])
     
     return boat_id
 
+def prepare_recording(recording_data):
+    """Return the cached points and segment directions and lengths of a recording."""
+    segments = recording_data.get("segments")
+    if segments is None:
+        for movement in recording_data["movements"]:
+            rotation = movement["rotation"]
+            movement["rotation"] = {axis: round(angle, ANGLE_DECIMALS) for axis, angle in rotation.items()}
+            for key in ("sailAngle", "heelAngle"):
+                if key in movement:
+                    movement[key] = round(movement[key], ANGLE_DECIMALS)
+        
+        points = np.array([
+            [m["position"]["x"], m["position"]["y"], m["position"]["z"]]
+            for m in recording_data["movements"]
+        ], dtype=float).reshape(-1, 3).round(POSITION_DECIMALS)
+        deltas = np.diff(points, axis=0)
+        lengths = np.linalg.norm(deltas, axis=1)
+        directions = np.divide(deltas, lengths[:, np.newaxis],
+                               out=np.zeros_like(deltas), where=lengths[:, np.newaxis] > 0)
+        segments = {
+            "point": points.tolist(),
+            "direction": directions.tolist(),
+            "length": lengths.tolist()
+        }
+        recording_data["segments"] = segments
+    return segments
+
 def create_recorded_boat(recording_data):
     """Create a new AI boat that follows a recorded player path."""
-    boat_id = f"pirate_{uuid.uuid4()}"
+    boat_id = f"pirate_{next(ai_boat_id_counter)}"
     
     # Get first movement for initial position and rotation
     if not recording_data["movements"]:
-        logging.error("Cannot create recorded boat: no movements in recording")
+        logger.error("Cannot create recorded boat: no movements in recording")
         return None
     
     first_movement = recording_data["movements"][0]
+    segments = prepare_recording(recording_data)
+    start_x, start_y, start_z = segments["point"][0]
     
     # Choose a random color for this boat
-    colors = ["#8B4513", "#006400", "#2F4F4F", "#800000", "#191970"]
-    boat_color = random.choice(colors)
+    boat_color = random.choice(PIRATE_COLORS)
     
     ai_boats[boat_id] = {
         "boat_data": {
-            "position": {
-                "x": first_movement["position"]["x"],
-                "y": first_movement["position"]["y"],
-                "z": first_movement["position"]["z"]
-            },
+            "position": {"x": start_x, "y": start_y, "z": start_z},
             "rotation": {
                 "x": first_movement["rotation"]["x"],
                 "y": first_movement["rotation"]["y"],
@@ -319,14 +527,42 @@ def create_recorded_boat(recording_data):
         },
         "type": "recorded",  # Mark this as a recorded path boat
         "recording": recording_data["movements"],
+        "segments": segments,
         "current_index": 0,
-        "last_update_time": time.time(),
-        "loop": False  # Changed to False - Don't loop the recording when it ends
+        "segment_progress": 0.0,  # Distance travelled from the current point
+        "loop": False,  # Changed to False - Don't loop the recording when it ends
+        "last_sent": None  # Position and time this boat was last broadcast
     }
+    refresh_ai_boats_data()
     
-    logging.info(f"Created new recorded boat {boat_id} with {len(recording_data['movements'])} movements")
+    logger.info("Created new recorded boat %s with %s movements", boat_id, len(recording_data['movements']))
     return boat_id
 
+def step_linear_boats(dt):
+    """Advance all linear AI boats by dt seconds using vectorized NumPy math."""
+    state = linear_boats
+    if not state["ids"]:
+        return
+    
+    # Move every boat along its velocity for the elapsed time
+    state["position"] += state["velocity"] * dt
+    state["distance"] += state["speed"] * dt
+    
+    # Reset boats that have reached their maximum distance to the start position
+    reset = state["distance"] >= state["max_distance"]
+    if reset.any():
+        state["position"][reset] = state["start_position"][reset]
+        state["distance"][reset] = 0
+        for index in np.flatnonzero(reset):
+            boat_id = state["ids"][index]
+            logger.info("Pirate %s (%s) reached maximum distance and reset to start position", boat_id, ai_boats[boat_id]['boat_data']['name'])
+    
+    # Copy the new positions into the boat data that gets broadcast
+    for boat_id, (x, z) in zip(state["ids"], state["position"].round(POSITION_DECIMALS).tolist()):
+        position = ai_boats[boat_id]["boat_data"]["position"]
+        position["x"] = x
+        position["z"] = z
+
 async def spawn_boats_over_time():
     """Spawn new boats periodically from recorded paths using round-robin selection."""
     global current_recording_index
@@ -353,7 +589,7 @@ async def spawn_boats_over_time():
                 if len(ai_boats) < target_boats:
                     try:
                         boat_id = create_recorded_boat(recording)
-                        logging.info(f"Spawned new recorded path pirate ({current_recording_index-1}/{len(recorded_paths)}) (Total: {len(ai_boats)}/{target_boats})")
+                        logger.info("Spawned new recorded path pirate (%s/%s) (Total: %s/%s)", current_recording_index-1, len(recorded_paths), len(ai_boats), target_boats)
                         
                         if boat_id:
                             # Create initial boat data for new clients
@@ -364,253 +600,253 @@ async def spawn_boats_over_time():
                             }
                             
                             # Broadcast the new boat to all clients
-                            await broadcast_to_all(json.dumps(boat_data))
+                            broadcast_to_all(boat_data)
                     except Exception as e:
-                        logging.error(f"Error creating new boat: {e}")
+                        logger.error("Error creating new boat: %s", e)
                 else:
-                    logging.info(f"Skipped spawning boat: at maximum ({len(ai_boats)}/{target_boats})")
+                    logger.info("Skipped spawning boat: at maximum (%s/%s)", len(ai_boats), target_boats)
         except Exception as e:
-            logging.error(f"Critical error in spawn_boats_over_time: {str(e)}")
+            logger.error("Critical error in spawn_boats_over_time: %s", e)
             # Sleep a bit before retrying to avoid tight error loops
             await asyncio.sleep(spawn_interval)
 
-async def update_ai_boats():
-    """Update positions of AI boats."""
-    while True:
+def update_ai_boats(dt):
+    """Advance AI boats by dt seconds."""
+    # Move all linear boats at once
+    step_linear_boats(dt)
+    
+    # Distance a recorded boat covers during this update
+    recorded_step = RECORDED_BOAT_SPEED * dt
+    
+    # Boats are removed after the loop so ai_boats isn't copied every tick
+    finished_boats = []
+    
+    for ai_id, ai_data in ai_boats.items():
         try:
-            current_time = time.time()
-            
-            for ai_id, ai_data in list(ai_boats.items()):
-                try:
-                    # Handle different types of boat movement
-                    if ai_data["type"] == "recorded":
-                        # Handle recorded path movement
-                        movements = ai_data["recording"]
-                        current_index = ai_data["current_index"]
-                        
-                        # If we've reached the end of the recording
-                        if current_index >= len(movements) - 1:
-                            if ai_data["loop"]:
-                                # Reset to beginning if looping
-                                ai_data["current_index"] = 0
-                                current_index = 0
-                                logging.info(f"Recorded boat {ai_id} reached end of recording, looping")
-                            else:
-                                # Remove the boat if not looping
-                                logging.info(f"Recorded boat {ai_id} reached end of recording, removing")
-                                del ai_boats[ai_id]
-                                continue
-                        
-                        # Get current and next movement
-                        current_movement = movements[current_index]
-                        next_index = current_index + 1
-                        
-                        # If we're at the end of the recording and looping, next is the first movement
-                        if next_index >= len(movements) and ai_data["loop"]:
-                            next_index = 0
-                        
-                        # If we have a next movement to interpolate to
-                        if next_index < len(movements):
-                            next_movement = movements[next_index]
-                            
-                            # Calculate position by interpolating between current and next
-                            # The original recording may have variable frame rates, so we use
-                            # a fixed interpolation speed
-                            
-                            # Get current position
-                            current_pos = ai_data["boat_data"]["position"]
-                            next_pos = next_movement["position"]
-                            
-                            # Calculate direction vector
-                            dir_x = next_pos["x"] - current_pos["x"]
-                            dir_y = next_pos["y"] - current_pos["y"]
-                            dir_z = next_pos["z"] - current_pos["z"]
-                            
-                            # Calculate distance
-                            distance = math.sqrt(dir_x**2 + dir_y**2 + dir_z**2)
-                            
-                            # Calculate interpolation speed (units per second)
-                            speed = 5  # Fixed speed for smoother movement
-                            
-                            # If we're close enough to the next point, advance to it
-                            if distance < 0.5 or speed * 0.1 >= distance:
-                                ai_data["current_index"] += 1
-                                
-                                # Update position, rotation, and sail angle
-                                ai_data["boat_data"]["position"] = next_movement["position"]
-                                ai_data["boat_data"]["rotation"] = next_movement["rotation"]
-                                if "sailAngle" in next_movement:
-                                    ai_data["boat_data"]["sailAngle"] = next_movement["sailAngle"]
-                                if "heelAngle" in next_movement:
-                                    ai_data["boat_data"]["heelAngle"] = next_movement["heelAngle"]
-                            else:
-                                # Normalize direction vector
-                                if distance > 0:
-                                    dir_x /= distance
-                                    dir_y /= distance
-                                    dir_z /= distance
-                                
-                                # Calculate new position
-                                ai_data["boat_data"]["position"]["x"] += dir_x * speed * 0.1
-                                ai_data["boat_data"]["position"]["y"] += dir_y * speed * 0.1
-                                ai_data["boat_data"]["position"]["z"] += dir_z * speed * 0.1
-                                
-                                # Interpolate rotation as well
-                                # For simplicity, we just use the next rotation value directly
-                                ai_data["boat_data"]["rotation"] = next_movement["rotation"]
-                                
-                                # Interpolate sail angle if available
-                                if "sailAngle" in next_movement:
-                                    ai_data["boat_data"]["sailAngle"] = next_movement["sailAngle"]
-                                    
-                                # Interpolate heel angle if available
-                                if "heelAngle" in next_movement:
-                                    ai_data["boat_data"]["heelAngle"] = next_movement["heelAngle"]
-                    
-                    elif ai_data["type"] == "linear":
-                        # Standard linear movement for non-recorded boats
-                        # Get current position and direction
-                        current_x = ai_data["boat_data"]["position"]["x"]
-                        current_z = ai_data["boat_data"]["position"]["z"]
-                        direction_x = ai_data["direction"]["x"]
-                        direction_z = ai_data["direction"]["z"]
-                        speed = ai_data["speed"]
-                        
-                        # Calculate new position (straight line movement)
-                        new_x = current_x + direction_x * speed * 0.1  # Scale speed by time factor
-                        new_z = current_z + direction_z * speed * 0.1
-                        
-                        # Update distance traveled
-                        ai_data["distance"] += speed * 0.1
-                        
-                        # Check if boat has reached max distance
-                        if ai_data["distance"] >= ai_data["max_distance"]:
-                            # Reset to start position
-                            new_x = ai_data["start_position"]["x"]
-                            new_z = ai_data["start_position"]["z"]
-                            ai_data["distance"] = 0
-                            logging.info(f"Pirate {ai_id} ({ai_data['boat_data']['name']}) reached maximum distance and reset to start position")
-                        
-                        # Update boat data
-                        ai_data["boat_data"]["position"]["x"] = new_x
-                        ai_data["boat_data"]["position"]["z"] = new_z
-                    
-                    # Broadcast updated boat position to all clients
-                    broadcast_data = {
-                        "type": "boat_update",
-                        "client_id": ai_id,
-                        "boat_data": ai_data["boat_data"]
-                    }
-                    
-                    await broadcast_to_all(json.dumps(broadcast_data))
-                except KeyError as e:
-                    logging.error(f"KeyError in update_ai_boats for boat {ai_id}: {e}")
-                except Exception as e:
-                    logging.error(f"Error processing boat {ai_id}: {e}")
+            # Handle different types of boat movement
+            if ai_data["type"] == "recorded":
+                # Handle recorded path movement
+                movements = ai_data["recording"]
+                current_index = ai_data["current_index"]
+                
+                # If we've reached the end of the recording
+                if current_index >= len(movements) - 1:
+                    if ai_data["loop"]:
+                        # Reset to beginning if looping
+                        ai_data["current_index"] = 0
+                        ai_data["segment_progress"] = 0.0
+                        current_index = 0
+                        logger.info("Recorded boat %s reached end of recording, looping", ai_id)
+                    else:
+                        # Remove the boat if not looping
+                        logger.info("Recorded boat %s reached end of recording, removing", ai_id)
+                        finished_boats.append(ai_id)
+                        continue
+                
+                # Move along the path at a fixed speed, as the original
+                # recording may have variable frame rates, using the segment
+                # geometry precomputed for the recording. Distance left over
+                # after reaching a point carries into the next segment, so the
+                # speed doesn't depend on how often boats are updated.
+                segments = ai_data["segments"]
+                lengths = segments["length"]
+                last_index = len(movements) - 1
+                progress = ai_data["segment_progress"] + recorded_step
+                while current_index < last_index and progress >= lengths[current_index]:
+                    progress -= lengths[current_index]
+                    current_index += 1
+                ai_data["current_index"] = current_index
+                
+                boat_data = ai_data["boat_data"]
+                current_pos = boat_data["position"]
+                if current_index == last_index:
+                    # Stop on the last point; the next update loops or removes
+                    # the boat. The position is copied so later steps don't
+                    # move the recording's own point.
+                    ai_data["segment_progress"] = 0.0
+                    current_pos["x"], current_pos["y"], current_pos["z"] = segments["point"][current_index]
+                    next_movement = movements[current_index]
+                else:
+                    # Interpolate from the current point towards the next one
+                    ai_data["segment_progress"] = progress
+                    start_x, start_y, start_z = segments["point"][current_index]
+                    dir_x, dir_y, dir_z = segments["direction"][current_index]
+                    current_pos["x"] = round(start_x + dir_x * progress, POSITION_DECIMALS)
+                    current_pos["y"] = round(start_y + dir_y * progress, POSITION_DECIMALS)
+                    current_pos["z"] = round(start_z + dir_z * progress, POSITION_DECIMALS)
+                    next_movement = movements[current_index + 1]
+                
+                # For simplicity, we just use the next rotation value directly
+                boat_data["rotation"] = next_movement["rotation"]
+                if "sailAngle" in next_movement:
+                    boat_data["sailAngle"] = next_movement["sailAngle"]
+                if "heelAngle" in next_movement:
+                    boat_data["heelAngle"] = next_movement["heelAngle"]
             
-            # Update every 100ms
-            await asyncio.sleep(0.1)
+            # Linear boats were already advanced by step_linear_boats
+        except KeyError as e:
+            logger.error("KeyError in update_ai_boats for boat %s: %s", ai_id, e)
         except Exception as e:
-            logging.error(f"Critical error in update_ai_boats main loop: {str(e)}")
-            # Sleep a bit longer before retrying to avoid tight error loops
-            await asyncio.sleep(1.0)
+            logger.error("Error processing boat %s: %s", ai_id, e)
+    
+    if finished_boats:
+        for ai_id in finished_boats:
+            del ai_boats[ai_id]
+        refresh_ai_boats_data()
 
-async def heartbeat():
-    """Send regular heartbeat logs to keep the server active and monitor its health."""
-    while True:
+def collect_ai_boat_changes(now):
+    """Return the boat data of AI boats that moved or are due for a keepalive."""
+    changed = {}
+    for ai_id, ai_data in ai_boats.items():
+        position = ai_data["boat_data"]["position"]
+        last_sent = ai_data["last_sent"]
+        if (last_sent is None
+                or abs(position["x"] - last_sent[0]) + abs(position["z"] - last_sent[1]) > AI_BOAT_MIN_MOVE
+                or now - last_sent[2] >= AI_BOAT_KEEPALIVE):
+            ai_data["last_sent"] = (position["x"], position["z"], now)
+            changed[ai_id] = ai_data["boat_data"]
+    return changed
+
+def world_tick(loop, next_update, last_update):
+    """Move the AI boats, broadcast changed boats, and schedule the next tick."""
+    global pending_boat_updates
+    update_time = loop.time()
+    dt = min(update_time - last_update, MAX_AI_TIMESTEP)
+    try:
         try:
-            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            logging.info(f"Heartbeat - Server active - {now} - AI boats: {len(ai_boats)} - Clients: {len(connected_clients)}")
-            await asyncio.sleep(300)  # 5-minute heartbeat
+            update_ai_boats(dt)
         except Exception as e:
-            logging.error(f"Error in heartbeat: {str(e)}")
-            await asyncio.sleep(300)  # Wait before retrying
+            logger.error("Critical error in update_ai_boats: %s", e)
+        
+        # Send every boat that changed this tick in one message
+        boats = collect_ai_boat_changes(update_time)
+        if pending_boat_updates:
+            boats.update(pending_boat_updates)
+            pending_boat_updates = {}
+        if boats:
+            broadcast_to_all({
+                "type": "boats_batch",
+                "boats": boats
+            }, droppable=True)
+    except Exception as e:
+        logger.error("Error in world tick: %s", e)
+    finally:
+        # Always schedule the next tick, so one failed tick can't stop the world
+        next_update += WORLD_TICK_INTERVAL
+        now = loop.time()
+        if next_update < now:
+            # Running late: skip the missed ticks rather than bursting to catch up
+            if now - next_update > WORLD_TICK_INTERVAL:
+                logger.warning("World tick running %.3fs behind schedule", now - next_update)
+            next_update = now
+        loop.call_at(next_update, world_tick, loop, next_update, update_time)
+
+def heartbeat(loop):
+    """Send regular heartbeat logs to keep the server active and monitor its health."""
+    try:
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        logger.info("Heartbeat - Server active - %s - AI boats: %s - Clients: %s", now, len(ai_boats), len(connected_clients))
+    except Exception as e:
+        logger.error("Error in heartbeat: %s", e)
+    loop.call_later(300, heartbeat, loop)  # 5-minute heartbeat
 
 async def handler(websocket):
     """Handle a connection and dispatch messages."""
-    # Register new client
-    await register(websocket)
-    client_id = id(websocket)
-    update_count = 0
-    
+    # Register new client. The client ID is assigned before register first
+    # awaits, so the client is unregistered below even if registering fails.
     try:
+        await register(websocket)
+        client_id = websocket.client_id
+        client = connected_clients[client_id]
+        update_count = 0
+        
+        # Only set when recording is enabled; bound once for the message loop
+        recording = client.recording
+        recording_start_time = client.recording_start_time
+        
+        # Decode messages in the wire format the client negotiated
+        if client.msgpack:
+            message_decoder = msgpack_message_decoder
+        else:
+            message_decoder = json_message_decoder
+        
         async for message in websocket:
             try:
-                data = json.loads(message)
+                data = message_decoder.decode(message)
                 update_count += 1
                 
-                if data["type"] == "boat_update":
-                    # Store the client's boat data
-                    connected_clients[client_id]["boat_data"] = data["boat_data"]
+                if isinstance(data, BoatUpdateMessage):
+                    # Store the client's boat data as plain dicts, leaving
+                    # out optional fields the client didn't send
+                    boat_data = msgspec.to_builtins(data.boat_data)
+                    # Keep the flag from the last flag update so new clients see it
+                    if client.flag:
+                        boat_data["flag"] = client.flag
+                    client.boat_data = boat_data
+                    boats_with_data[client_id] = boat_data
                     
                     # Record this movement if recording is enabled
-                    if record_sessions and "recording" in connected_clients[client_id]:
+                    if recording is not None:
                         # Add timestamp relative to start time
-                        timestamp = time.time() - connected_clients[client_id]["recording_start_time"]
+                        timestamp = time.monotonic() - recording_start_time
                         
                         # Add this position to the recording with a timestamp
                         movement = {
                             "timestamp": timestamp,
-                            "position": data["boat_data"]["position"],
-                            "rotation": data["boat_data"]["rotation"]
+                            "position": boat_data["position"],
+                            "rotation": boat_data["rotation"]
                         }
                         
                         # Add sail angle if available
-                        if "sailAngle" in data["boat_data"]:
-                            movement["sailAngle"] = data["boat_data"]["sailAngle"]
+                        if "sailAngle" in boat_data:
+                            movement["sailAngle"] = boat_data["sailAngle"]
                             
                         # Add heel angle if available
-                        if "heelAngle" in data["boat_data"]:
-                            movement["heelAngle"] = data["boat_data"]["heelAngle"]
+                        if "heelAngle" in boat_data:
+                            movement["heelAngle"] = boat_data["heelAngle"]
                             
-                        connected_clients[client_id]["recording"].append(movement)
+                        recording.append(movement)
                     
                     # Log boat position occasionally (not every update to avoid log spam)
-                    if debug_boats and update_count % 100 == 0 and "position" in data["boat_data"]:
-                        pos = data["boat_data"]["position"]
-                        logging.info(f"Client {client_id} boat position: ({pos['x']}, {pos['y']})")
-                    
-                    # Update the player positions list
-                    update_player_position_list()
+                    if debug_boats and update_count % 100 == 0 and "position" in boat_data:
+                        pos = boat_data["position"]
+                        logger.info("Client %s boat position: (%s, %s)", client_id, pos['x'], pos['y'])
                     
-                    # Create message to broadcast
-                    broadcast_data = {
-                        "type": "boat_update",
-                        "client_id": client_id,
-                        "boat_data": data["boat_data"]
-                    }
-                    
-                    # Broadcast to all other clients
-                    await broadcast_to_others(json.dumps(broadcast_data), client_id)
+                    # Relay to all clients on the next world tick, keeping
+                    # only the latest update of each client
+                    pending_boat_updates[client_id] = boat_data
                 
-                elif data["type"] == "flag_update":
+                elif isinstance(data, FlagUpdateMessage):
                     # Store the client's flag information
-                    flag_code = data.get("flag_code", "")
-                    connected_clients[client_id]["flag"] = flag_code
+                    flag_code = data.flag_code
+                    client.flag = flag_code
                     
                     # Add flag info to boat data if it exists
-                    if connected_clients[client_id]["boat_data"]:
-                        connected_clients[client_id]["boat_data"]["flag"] = flag_code
+                    if client.boat_data:
+                        client.boat_data["flag"] = flag_code
                         
                         # Create message to broadcast
                         broadcast_data = {
                             "type": "boat_update",
                             "client_id": client_id,
-                            "boat_data": connected_clients[client_id]["boat_data"]
+                            "boat_data": client.boat_data
                         }
                         
                         # Broadcast to all other clients
-                        await broadcast_to_others(json.dumps(broadcast_data), client_id)
+                        broadcast_to_others(broadcast_data, client_id)
                         
-                    logging.info(f"Client {client_id} updated flag to: {flag_code}")
+                    logger.info("Client %s updated flag to: %s", client_id, flag_code)
                 
-            except json.JSONDecodeError:
-                logging.error(f"Invalid JSON from client {client_id}")
+            except msgspec.ValidationError as e:
+                logger.error("Invalid message from client %s: %s", client_id, e)
+            except (msgspec.DecodeError, TypeError):
+                # TypeError: a text frame from a MessagePack client
+                logger.error("Undecodable message from client %s", client_id)
             except KeyError as e:
-                logging.error(f"Missing key in message from client {client_id}: {e}")
+                logger.error("Missing key in message from client %s: %s", client_id, e)
     
     except websockets.exceptions.ConnectionClosed:
-        logging.info(f"Connection closed for client {client_id}")
+        logger.info("Connection closed for client %s", websocket.client_id)
     
     finally:
         # Unregister on disconnection
@@ -621,7 +857,7 @@ async def main():
     # Get port from environment variable (Heroku sets this)
     port = int(os.environ.get("PORT", 8765))
     
-    logging.info(f"Starting WebSocket server on {host}:{port}")
+    logger.info("Starting WebSocket server on %s:%s", host, port)
     
     # Create initial AI boats
     create_ai_boats()
@@ -633,22 +869,43 @@ async def main():
                 task = asyncio.create_task(task_func())
                 await task
             except asyncio.CancelledError:
-                logging.info(f"{task_name} task was cancelled")
+                logger.info("%s task was cancelled", task_name)
                 break
             except Exception as e:
-                logging.error(f"{task_name} task failed with error: {str(e)}")
-                logging.info(f"Restarting {task_name} task in 5 seconds...")
+                logger.error("%s task failed with error: %s", task_name, e)
+                logger.info("Restarting %s task in 5 seconds...", task_name)
                 await asyncio.sleep(5)
     
-    # Start AI boat update and spawning tasks with monitoring
-    ai_boat_monitor = asyncio.create_task(monitor_task(update_ai_boats, "AI boat update"))
+    # Start the world ticks; they reschedule themselves every tick
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    loop.call_soon(world_tick, loop, start_time, start_time)
+    
+    # Start the spawning task with monitoring
     spawn_monitor = asyncio.create_task(monitor_task(spawn_boats_over_time, "Boat spawning"))
     
-    # Start heartbeat task
-    heartbeat_monitor = asyncio.create_task(monitor_task(heartbeat, "Heartbeat"))
+    # Start heartbeat logs; they reschedule themselves
+    loop.call_soon(heartbeat, loop)
     
-    async with websockets.serve(handler, host, port):
+    # Clients that don't request the MessagePack subprotocol keep using JSON.
+    # Compression is disabled because messages are small and frequent, so
+    # deflating them per connection costs more CPU than it saves bandwidth.
+    async with websockets.serve(
+        handler,
+        host,
+        port,
+        subprotocols=[MSGPACK_SUBPROTOCOL],
+        ping_interval=PING_INTERVAL,
+        ping_timeout=PING_TIMEOUT,
+        write_limit=WRITE_LIMIT,
+        max_queue=MAX_QUEUE,
+        compression=None
+    ):
         await asyncio.Future()  # Run forever
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # Prefer uvloop's libuv-based event loop when it is installed
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
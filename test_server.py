@@ -1,77 +1,152 @@
 #!/usr/bin/env python3
+import argparse
 import asyncio
+import logging
+import logging.handlers
+import msgspec
+import queue
 import websockets
-import json
 import random
 import math
-import time
 
-async def test_client():
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+class Vector3(msgspec.Struct):
+    x: float
+    y: float
+    z: float
+
+class BoatData(msgspec.Struct):
+    position: Vector3
+    rotation: Vector3
+    sailAngle: float
+
+class BoatUpdate(msgspec.Struct, tag="boat_update", tag_field="type"):
+    boat_data: BoatData
+
+class ServerMessage(msgspec.Struct):
+    # Only the type is logged; the decoders skip every other field
+    type: str
+
+# Build the encoders and decoders once and share them
+json_encoder = msgspec.json.Encoder()
+json_decoder = msgspec.json.Decoder(ServerMessage)
+msgpack_encoder = msgspec.msgpack.Encoder()
+msgpack_decoder = msgspec.msgpack.Decoder(ServerMessage)
+
+async def log_messages(websocket, decode):
+    """
+    Log the type of every message the server sends until the connection closes
+    """
+    try:
+        async for received in websocket:
+            message = decode(received)
+            logger.info("Received: %s", message.type)
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+async def test_client(use_msgpack=False):
     """
     A simple test client that simulates a boat moving in a circle
     """
     uri = "ws://localhost:8765"
     
+    # Speak MessagePack if requested, otherwise JSON
+    if use_msgpack:
+        subprotocols = ["msgpack"]
+        encoder = msgpack_encoder
+        decode = msgpack_decoder.decode
+    else:
+        subprotocols = None
+        encoder = json_encoder
+        decode = json_decoder.decode
+    
     try:
-        print(f"Connecting to server at {uri}...")
-        async with websockets.connect(uri) as websocket:
-            print("Connected!")
+        logger.info("Connecting to server at %s...", uri)
+        # Messages are too small for permessage-deflate to pay off, and the
+        # background reader keeps up, so only a few messages need buffering
+        async with websockets.connect(
+            uri,
+            subprotocols=subprotocols,
+            compression=None,
+            max_queue=8
+        ) as websocket:
+            logger.info("Connected!")
+            
+            # Receive and log messages from the server in the background
+            reader_task = asyncio.create_task(log_messages(websocket, decode))
             
-            # Initialize position
-            x, z = 0, 0
+            # Initialize heading and sail, and the fixed circle parameters
             angle = 0
             sail_angle = math.pi / 4  # 45 degrees
+            radius = 50
+            angle_step = 0.01
+            heading_offset = math.pi / 2  # Face tangent to circle
+            
+            # Build the boat update message once; each iteration only
+            # changes the position and heading
+            position = Vector3(0, 0, 0)
+            rotation = Vector3(0, angle, 0)
+            message = BoatUpdate(BoatData(position, rotation, sail_angle))
+            
+            # Encode every update into the same buffer instead of new bytes
+            buffer = bytearray()
             
-            # Run for 60 seconds
-            start_time = time.time()
-            while time.time() - start_time < 60:
+            # Run for 60 seconds, sending 600 updates 0.1 seconds apart on a
+            # fixed schedule so the time spent sending doesn't add up
+            loop = asyncio.get_running_loop()
+            next_update = loop.time()
+            for _ in range(600):
                 # Update position to move in a circle
-                angle += 0.01
-                radius = 50
-                x = radius * math.cos(angle)
-                z = radius * math.sin(angle)
-                
-                # Create boat update message
-                message = {
-                    "type": "boat_update",
-                    "boat_data": {
-                        "position": {
-                            "x": x,
-                            "y": 0,
-                            "z": z
-                        },
-                        "rotation": {
-                            "x": 0,
-                            "y": angle + math.pi/2,  # Face tangent to circle
-                            "z": 0
-                        },
-                        "sailAngle": sail_angle
-                    }
-                }
+                angle += angle_step
+                position.x = radius * math.cos(angle)
+                position.z = radius * math.sin(angle)
+                rotation.y = angle + heading_offset
                 
                 # Send update
-                await websocket.send(json.dumps(message))
-                
-                # Receive and print any messages from server
-                try:
-                    # Non-blocking receive
-                    received = await asyncio.wait_for(
-                        websocket.recv(), 
-                        timeout=0.1
-                    )
-                    data = json.loads(received)
-                    print(f"Received: {data['type']}")
-                except asyncio.TimeoutError:
-                    # No message received, that's fine
-                    pass
+                encoder.encode_into(message, buffer)
+                await websocket.send(buffer)
                 
-                # Wait a bit before next update
-                await asyncio.sleep(0.1)
+                # Wait until the next update is due
+                next_update += 0.1
+                delay = next_update - loop.time()
+                if delay < 0:
+                    # Running late: skip ahead rather than sending a burst
+                    next_update = loop.time()
+                await asyncio.sleep(max(0, delay))
                 
-            print("Test completed")
+            reader_task.cancel()
+            logger.info("Test completed")
             
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
 
 if __name__ == "__main__":
-    asyncio.run(test_client()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Test client that sails a boat in a circle')
+    parser.add_argument('--msgpack', action='store_true', help='Exchange MessagePack instead of JSON with the server')
+    args = parser.parse_args()
+    
+    # Write log lines from a background thread so printing every received
+    # message doesn't block the event loop
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(
+        format="%(message)s",
+        level=logging.INFO,
+        handlers=[logging.handlers.QueueHandler(log_queue)],
+    )
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    
+    try:
+        # Prefer uvloop's libuv-based event loop when it is installed
+        if uvloop is not None:
+            uvloop.run(test_client(args.msgpack))
+        else:
+            asyncio.run(test_client(args.msgpack))
+    finally:
+        listener.stop()
\ No newline at end of file
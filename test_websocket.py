@@ -1,16 +1,23 @@
 #!/usr/bin/env python3
+import argparse
 import asyncio
 import websockets
-import json
+import orjson
 import sys
 
-async def test_connection():
-    """Test WebSocket connection to the server."""
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
+async def test_connection(n_messages=1):
+    """Test WebSocket connection to the server, sending n_messages over it."""
     uri = "wss://sail-server-eb8a39ba5a31.herokuapp.com"
     
     print(f"Attempting to connect to {uri}...")
     try:
-        async with websockets.connect(uri) as websocket:
+        # Messages are too small for permessage-deflate to pay off
+        async with websockets.connect(uri, compression=None) as websocket:
             print("✓ Successfully connected to the WebSocket server!")
             
             # Send a simple boat update
@@ -23,18 +30,24 @@ async def test_connection():
                 }
             }
             
-            print("Sending test boat update...")
-            await websocket.send(json.dumps(test_message))
-            print("✓ Message sent successfully!")
+            encoded_message = orjson.dumps(test_message)
             
-            # Try to receive a response (could be initial_boats or other boats' updates)
-            print("Waiting for response (will timeout after 5 seconds)...")
-            try:
-                response = await asyncio.wait_for(websocket.recv(), timeout=5)
-                print(f"✓ Received response: {response}")
-            except asyncio.TimeoutError:
-                print("No response received within timeout (this could be normal if no other boats are connected)")
+            # Reuse the one connection for every probe instead of paying
+            # for a new handshake each time
+            for _ in range(n_messages):
+                print("Sending test boat update...")
+                await websocket.send(encoded_message)
+                print("✓ Message sent successfully!")
                 
+                # Try to receive a response (could be initial_boats or other boats' updates)
+                print("Waiting for response (will timeout after 5 seconds)...")
+                receive_task = asyncio.create_task(websocket.recv())
+                done, _ = await asyncio.wait({receive_task}, timeout=5)
+                if done:
+                    print(f"✓ Received response: {receive_task.result()}")
+                else:
+                    receive_task.cancel()
+                    print("No response received within timeout (this could be normal if no other boats are connected)")
             print("Test completed successfully!")
     except Exception as e:
         print(f"✗ Connection failed: {e}")
@@ -43,5 +56,13 @@ async def test_connection():
     return True
 
 if __name__ == "__main__":
-    result = asyncio.run(test_connection())
+    parser = argparse.ArgumentParser(description="Test the WebSocket connection to the server")
+    parser.add_argument("-n", "--messages", type=int, default=1, help="Number of test updates to send over the connection")
+    args = parser.parse_args()
+    
+    # Prefer uvloop's libuv-based event loop when it is installed
+    if uvloop is not None:
+        result = uvloop.run(test_connection(args.messages))
+    else:
+        result = asyncio.run(test_connection(args.messages))
     sys.exit(0 if result else 1) 
\ No newline at end of file